@@ -15,7 +15,6 @@ import {
   LabelList,
   ReferenceLine,
 } from 'recharts';
-import { NOTO_SANS_KR_REGULAR_BASE64 } from '@/lib/fonts/noto-sans-kr';
 
 interface OperatingPoint {
   stage: number;
@@ -86,9 +85,10 @@ export default function PdfGenerator({
     onGenerating?.(true);
 
     try {
-      const [{ default: jsPDF }, { default: html2canvas }] = await Promise.all([
+      const [{ default: jsPDF }, { default: html2canvas }, { NOTO_SANS_KR_REGULAR_BASE64 }] = await Promise.all([
         import('jspdf'),
         import('html2canvas'),
+        import('@/lib/fonts/noto-sans-kr'),
       ]);
 
       const doc = new jsPDF('p', 'mm', 'a4');
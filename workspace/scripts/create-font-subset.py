@@ -6,8 +6,13 @@
 
 from fontTools import subset
 from fontTools.ttLib import TTFont
-import base64
 import os
+from datetime import datetime
+
+try:
+    from pybase64 import b64encode  # SIMD 가속 Base64 (설치된 경우)
+except ImportError:
+    from base64 import b64encode
 
 # 보고서에서 사용되는 모든 텍스트
 KOREAN_TEXTS = """
@@ -58,50 +63,62 @@ ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz
  　
 """
 
+# 폰트에서 제외할 공백 문자 (str.isspace() 대상 중 ' ' 제외, 전각 공백 포함)
+WHITESPACE_CHARS = frozenset(
+    '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f\x85\xa0\u1680'
+    + ''.join(chr(c) for c in range(0x2000, 0x200b))
+    + '\u2028\u2029\u202f\u205f\u3000'
+)
+
+# Base64 스트리밍 인코딩 청크 크기 (3의 배수)
+BASE64_CHUNK_SIZE = 3 * 64 * 1024
+
 def get_unique_chars(text):
-    """텍스트에서 고유 문자 추출"""
-    chars = set()
-    for char in text:
-        if char.strip() or char == ' ':
-            chars.add(char)
-    return ''.join(sorted(chars))
+    """텍스트에서 고유 문자 추출 (공백 문자는 ' '만 유지)"""
+    return ''.join(sorted(set(text) - WHITESPACE_CHARS))
 
 def create_subset_font(input_path, output_path, chars):
     """서브셋 폰트 생성"""
     # 서브셋 옵션 설정
     options = subset.Options()
-    options.flavor = None  # TTF 유지
+    options.flavor = None  # TTF 유지 (jsPDF addFileToVFS는 WOFF2 미지원)
     options.desubroutinize = True
-    options.name_IDs = [0, 1, 2, 3, 4, 5, 6]  # 기본 이름 테이블만 유지
+    options.name_IDs = [0, 1, 2, 3, 4, 5, 6]  # 기본 이름 테이블만 유지 (jsPDF가 PostScript 이름 사용)
     options.notdef_outline = True
+    options.layout_features = []  # jsPDF는 GSUB/GPOS 셰이핑 미사용
+    options.hinting = False       # PDF 임베딩에는 힌팅 불필요
+    options.glyph_names = False
+    options.legacy_cmap = False
     
     # 폰트 로드
     font = TTFont(input_path)
     
     # 서브셋 생성
     subsetter = subset.Subsetter(options=options)
-    subsetter.populate(text=chars)
+    subsetter.populate(unicodes=[ord(char) for char in chars])
     subsetter.subset(font)
     
     # 저장
     font.save(output_path)
     return output_path
 
-def font_to_base64(font_path):
-    """폰트 파일을 Base64로 인코딩"""
-    with open(font_path, 'rb') as f:
-        return base64.b64encode(f.read()).decode('utf-8')
-
-def create_ts_file(base64_data, output_path):
-    """TypeScript 파일 생성"""
-    ts_content = f'''// 자동 생성된 파일 - 수정하지 마세요
+def create_ts_file(font_path, output_path):
+    """TypeScript 파일 생성 (폰트를 청크 단위로 Base64 인코딩하여 바로 기록)"""
+    header = f'''// 자동 생성된 파일 - 수정하지 마세요
 // Noto Sans KR 서브셋 폰트 (보고서용 한글만 포함)
-// 생성일: {os.popen("date '+%Y-%m-%d %H:%M:%S'").read().strip()}
-
-export const NOTO_SANS_KR_REGULAR_BASE64 = "{base64_data}";
-'''
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(ts_content)
+// 생성일: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+export const NOTO_SANS_KR_REGULAR_BASE64 = "'''
+    base64_size = 0
+    with open(font_path, 'rb') as src, open(output_path, 'wb') as out:
+        out.write(header.encode('utf-8'))
+        # 청크 크기가 3의 배수이므로 중간 패딩 없이 이어 붙일 수 있음
+        while chunk := src.read(BASE64_CHUNK_SIZE):
+            encoded = b64encode(chunk)
+            out.write(encoded)
+            base64_size += len(encoded)
+        out.write(b'";\n')
+    return base64_size
 
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -131,12 +148,9 @@ def main():
     print(f"압축률: {(1 - subset_size/original_size) * 100:.1f}%")
     
     # Base64 인코딩 및 TS 파일 생성
-    print(f"\nBase64 인코딩 중...")
-    base64_data = font_to_base64(output_font)
-    print(f"Base64 크기: {len(base64_data) / 1024:.1f} KB")
-    
-    print(f"\nTypeScript 파일 생성 중...")
-    create_ts_file(base64_data, output_ts)
+    print(f"\nBase64 인코딩 및 TypeScript 파일 생성 중...")
+    base64_size = create_ts_file(output_font, output_ts)
+    print(f"Base64 크기: {base64_size / 1024:.1f} KB")
     print(f"생성 완료: {output_ts}")
 
 if __name__ == '__main__':
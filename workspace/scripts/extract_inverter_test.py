@@ -6,52 +6,61 @@
 에너지 절감 검증용 CSV를 생성합니다.
 """
 
-import csv
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
+
+# CSV 스트리밍 로드 단위 (행)
+CHUNK_SIZE = 1_000_000
+
 
 def extract_stable_by_flow(filepath, target_pressure_min, target_pressure_max):
     """유량별 안정 데이터 추출"""
-    flow_groups = {}
+    # Main_Flow(3), OUT_PT050(5), Main_kW(13) 컬럼만 청크 단위로 로드
+    reader = pd.read_csv(filepath, usecols=[3, 5, 13], header=0, encoding='utf-8',
+                         engine='c', on_bad_lines='skip', chunksize=CHUNK_SIZE)
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        next(reader)  # 헤더 스킵
+    # 청크별 유량 구간 합계/개수만 유지하여 메모리 사용량 제한
+    partials = []
+    for chunk in reader:
+        chunk.columns = ['flow', 'pressure', 'power']
+        chunk = chunk.apply(pd.to_numeric, errors='coerce').dropna()
         
-        for row in reader:
-            try:
-                flow = float(row[3])
-                pressure = float(row[5])
-                power = float(row[13])
-                
-                # 목표 압력 범위 내 데이터만
-                if target_pressure_min <= pressure <= target_pressure_max:
-                    flow_bin = int(flow / 5) * 5  # 5 단위로 그룹핑
-                    if flow_bin not in flow_groups:
-                        flow_groups[flow_bin] = []
-                    flow_groups[flow_bin].append({
-                        'flow': flow,
-                        'power': power,
-                        'pressure': pressure
-                    })
-            except (IndexError, ValueError):
-                continue
+        # 목표 압력 범위 내 데이터만
+        chunk = chunk[chunk['pressure'].between(target_pressure_min, target_pressure_max)]
+        
+        # 5 단위로 그룹핑 (정수 연산으로 0 방향 절사, int(flow / 5) * 5와 동일)
+        flow_int = chunk['flow'].to_numpy().astype(np.int32)
+        flow_bin = flow_int - np.fmod(flow_int, 5)
+        partials.append(chunk.groupby(flow_bin).agg(
+            flow=('flow', 'sum'),
+            power=('power', 'sum'),
+            pressure=('pressure', 'sum'),
+            n_samples=('flow', 'size'),
+        ))
+    
+    if not partials:
+        return []
+    
+    # 그룹별 평균 (최소 10개 샘플)
+    groups = pd.concat(partials).groupby(level=0).sum()
+    groups = groups[groups['n_samples'] >= 10]
+    for col in ('flow', 'power', 'pressure'):
+        groups[col] = groups[col] / groups['n_samples']
     
-    # 각 그룹의 평균 계산
     results = []
-    for flow_bin, data in sorted(flow_groups.items()):
-        if len(data) >= 10:  # 최소 10개 샘플
-            avg_flow = sum(d['flow'] for d in data) / len(data)
-            avg_power = sum(d['power'] for d in data) / len(data)
-            avg_pressure = sum(d['pressure'] for d in data) / len(data)
-            
-            results.append({
-                'flow': round(avg_flow, 1),
-                'power': round(avg_power, 2),
-                'pressure': round(avg_pressure, 2),
-                'head': round(avg_pressure * 10.197, 1),
-                'n_samples': len(data)
-            })
+    for g in groups.itertuples():
+        results.append({
+            'flow': round(float(g.flow), 1),
+            'power': round(float(g.power), 2),
+            'pressure': round(float(g.pressure), 2),
+            'head': round(float(g.pressure) * 10.197, 1),
+            'n_samples': int(g.n_samples)
+        })
     
     return results
 
@@ -64,12 +73,35 @@ def main():
     
     all_data = []
     
+    # 테스트 파일별 추출은 서로 독립적이므로 동시에 실행 (CSV 파싱 중 GIL 해제)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        future_10bar = executor.submit(
+            extract_stable_by_flow,
+            phase2_dir / '10 bar Test_20260213_171525.csv',
+            9.5, 10.5
+        )
+        future_75bar_1 = executor.submit(
+            extract_stable_by_flow,
+            phase2_dir / '7.5 bar Test_01_20260213_165403.csv',
+            7.0, 8.0
+        )
+        future_75bar_2 = executor.submit(
+            extract_stable_by_flow,
+            phase2_dir / '7.5bar Test_02_20260213_170000.csv',
+            7.0, 8.0
+        )
+        future_5bar = executor.submit(
+            extract_stable_by_flow,
+            phase2_dir / '5 bar Test_20260213_161334.csv',
+            4.5, 5.5
+        )
+        data_10bar = future_10bar.result()
+        data_75bar_1 = future_75bar_1.result()
+        data_75bar_2 = future_75bar_2.result()
+        data_5bar = future_5bar.result()
+    
     # 10 bar 테스트
     print("=== 10 bar Test ===")
-    data_10bar = extract_stable_by_flow(
-        phase2_dir / '10 bar Test_20260213_171525.csv',
-        9.5, 10.5
-    )
     for d in data_10bar:
         d['target_pressure'] = 10
         d['source'] = '10 bar Test'
@@ -78,36 +110,23 @@ def main():
     
     # 7.5 bar 테스트 (두 파일 병합)
     print("\n=== 7.5 bar Test ===")
-    data_75bar_1 = extract_stable_by_flow(
-        phase2_dir / '7.5 bar Test_01_20260213_165403.csv',
-        7.0, 8.0
-    )
-    data_75bar_2 = extract_stable_by_flow(
-        phase2_dir / '7.5bar Test_02_20260213_170000.csv',
-        7.0, 8.0
+    # 병합 (반올림 유량이 같은 항목끼리 평균)
+    combined_75 = pd.DataFrame(data_75bar_1 + data_75bar_2,
+                               columns=['flow', 'power', 'pressure', 'head', 'n_samples'])
+    merged_75 = combined_75.groupby(combined_75['flow'].round()).agg(
+        flow=('flow', 'mean'),
+        power=('power', 'mean'),
+        pressure=('pressure', 'mean'),
+        n_samples=('n_samples', 'sum'),
     )
     
-    # 병합
-    combined_75 = {}
-    for d in data_75bar_1 + data_75bar_2:
-        flow_key = round(d['flow'])
-        if flow_key not in combined_75:
-            combined_75[flow_key] = []
-        combined_75[flow_key].append(d)
-    
-    for flow_key in sorted(combined_75.keys()):
-        items = combined_75[flow_key]
-        avg_flow = sum(d['flow'] for d in items) / len(items)
-        avg_power = sum(d['power'] for d in items) / len(items)
-        avg_pressure = sum(d['pressure'] for d in items) / len(items)
-        total_samples = sum(d['n_samples'] for d in items)
-        
+    for g in merged_75.itertuples():
         merged = {
-            'flow': round(avg_flow, 1),
-            'power': round(avg_power, 2),
-            'pressure': round(avg_pressure, 2),
-            'head': round(avg_pressure * 10.197, 1),
-            'n_samples': total_samples,
+            'flow': round(float(g.flow), 1),
+            'power': round(float(g.power), 2),
+            'pressure': round(float(g.pressure), 2),
+            'head': round(float(g.pressure) * 10.197, 1),
+            'n_samples': int(g.n_samples),
             'target_pressure': 7.5,
             'source': '7.5 bar Test'
         }
@@ -116,10 +135,6 @@ def main():
     
     # 5 bar 테스트
     print("\n=== 5 bar Test ===")
-    data_5bar = extract_stable_by_flow(
-        phase2_dir / '5 bar Test_20260213_161334.csv',
-        4.5, 5.5
-    )
     for d in data_5bar:
         d['target_pressure'] = 5
         d['source'] = '5 bar Test'
@@ -129,11 +144,13 @@ def main():
     # CSV 저장
     output_file = output_dir / 'inverter_control_test_202602.csv'
     
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = ['target_pressure', 'flow', 'power', 'pressure', 'head', 'n_samples', 'source']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(sorted(all_data, key=lambda x: (x['target_pressure'], x['flow'])))
+    fieldnames = ['target_pressure', 'flow', 'power', 'pressure', 'head', 'n_samples', 'source']
+    # object dtype로 유지해야 target_pressure의 정수(5, 10)가 5.0, 10.0으로 바뀌지 않음
+    pd.DataFrame(
+        sorted(all_data, key=itemgetter('target_pressure', 'flow')),
+        columns=fieldnames,
+        dtype=object,
+    ).to_csv(output_file, index=False, encoding='utf-8', lineterminator='\r\n')
     
     print(f"\n저장 완료: {output_file}")
     print(f"총 {len(all_data)}개 데이터 포인트")
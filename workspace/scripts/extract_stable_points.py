@@ -11,104 +11,139 @@ CSV 파일에서 유량이 안정화된 구간을 자동 감지하고,
 """
 
 import os
-import csv
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
 
-def detect_stable_segments(rows, flow_tolerance=0.3, min_duration=10):
+
+# 프로세스 풀 병렬 처리를 시작하는 입력 CSV 총 크기 (bytes)
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+
+# 구간별 결과 레코드 (구간당 한 행)
+RESULT_DTYPE = np.dtype([
+    ('flow', 'f8'),
+    ('power', 'f8'),
+    ('pressure', 'f8'),
+    ('head', 'f8'),
+    ('duration', 'i8'),
+    ('std_flow', 'f8'),
+    ('std_power', 'f8'),
+])
+
+def detect_stable_segments(flow, flow_tolerance=0.3, min_duration=10):
     """
     안정 구간 감지
     
     Args:
-        rows: CSV 데이터 행 리스트
+        flow: 유량 배열 (numpy.ndarray)
         flow_tolerance: 유량 허용 오차 (m³/h)
         min_duration: 최소 안정 지속 시간 (초)
     
     Returns:
         안정 구간 리스트 [(start_idx, end_idx), ...]
     """
-    if len(rows) < min_duration:
+    # 기준 유량이 이탈 지점마다 재설정되는 순차 스캔이므로
+    # numpy 스칼라 대신 Python float 리스트에서 반복
+    flows = flow.tolist()
+    n = len(flows)
+    if n < min_duration:
         return []
     
     segments = []
     start_idx = 0
-    ref_flow = rows[0]['flow']
+    ref_flow = flows[0]
     
-    for i, row in enumerate(rows):
-        if abs(row['flow'] - ref_flow) > flow_tolerance:
+    for i, value in enumerate(flows):
+        if abs(value - ref_flow) > flow_tolerance:
             if i - start_idx >= min_duration:
                 segments.append((start_idx, i - 1))
             start_idx = i
-            ref_flow = row['flow']
+            ref_flow = value
     
     # 마지막 구간 처리
-    if len(rows) - start_idx >= min_duration:
-        segments.append((start_idx, len(rows) - 1))
+    if n - start_idx >= min_duration:
+        segments.append((start_idx, n - 1))
     
     return segments
 
 
-def calculate_segment_average(rows, start_idx, end_idx):
-    """구간 평균 계산"""
-    segment = rows[start_idx:end_idx + 1]
-    n = len(segment)
+def calculate_segment_average(flow, power, pressure, segments):
+    """
+    구간별 평균 계산
     
-    avg_flow = sum(r['flow'] for r in segment) / n
-    avg_power = sum(r['power'] for r in segment) / n
-    avg_pressure = sum(r['pressure'] for r in segment) / n
+    모든 구간을 np.add.reduceat으로 한 번에 집계합니다.
+    합산 순서는 numpy 구현을 따르므로 Python sum()과 마지막 자리에서 다를 수 있고,
+    소수점 반올림 경계(예: x.xx5)에 걸친 값은 반올림 결과가 달라질 수 있습니다.
     
-    # 표준편차 (안정성 지표)
-    std_flow = (sum((r['flow'] - avg_flow) ** 2 for r in segment) / n) ** 0.5
-    std_power = (sum((r['power'] - avg_power) ** 2 for r in segment) / n) ** 0.5
+    Returns:
+        구간당 한 행인 RESULT_DTYPE 배열
+    """
+    results = np.empty(len(segments), dtype=RESULT_DTYPE)
+    if not segments:
+        return results
+    
+    starts = np.array([s for s, _ in segments], dtype=np.intp)
+    counts = np.array([e - s + 1 for s, e in segments], dtype=np.intp)
+    
+    # 안정 구간에 속한 행만 이어 붙이고, 각 구간의 시작 오프셋으로 집계
+    offsets = np.cumsum(counts) - counts
+    rows = np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+    seg_flow = flow[rows]
+    seg_power = power[rows]
+    
+    avg_flow = np.add.reduceat(seg_flow, offsets) / counts
+    avg_power = np.add.reduceat(seg_power, offsets) / counts
+    avg_pressure = np.add.reduceat(pressure[rows], offsets) / counts
+    
+    # 표준편차 (안정성 지표) - 위에서 구한 평균을 재사용
+    std_flow = np.sqrt(np.add.reduceat((seg_flow - np.repeat(avg_flow, counts)) ** 2, offsets) / counts)
+    std_power = np.sqrt(np.add.reduceat((seg_power - np.repeat(avg_power, counts)) ** 2, offsets) / counts)
+    
+    # 반올림은 내장 round() 사용 (np.round는 x.xx5 경계에서 결과가 다름)
+    results['flow'] = [round(x, 2) for x in avg_flow.tolist()]
+    results['power'] = [round(x, 2) for x in avg_power.tolist()]
+    results['pressure'] = [round(x, 2) for x in avg_pressure.tolist()]
+    results['head'] = [round(x * 10.197, 1) for x in avg_pressure.tolist()]  # bar to m
+    results['duration'] = counts
+    results['std_flow'] = [round(x, 3) for x in std_flow.tolist()]
+    results['std_power'] = [round(x, 3) for x in std_power.tolist()]
     
-    return {
-        'flow': round(avg_flow, 2),
-        'power': round(avg_power, 2),
-        'pressure': round(avg_pressure, 2),
-        'head': round(avg_pressure * 10.197, 1),  # bar to m
-        'duration': end_idx - start_idx + 1,
-        'std_flow': round(std_flow, 3),
-        'std_power': round(std_power, 3)
-    }
+    return results
 
 
 def process_csv_file(filepath):
     """단일 CSV 파일 처리"""
-    rows = []
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        header = next(reader)  # 헤더 스킵
-        
-        for row in reader:
-            try:
-                flow = float(row[3])       # Main_Flow
-                pressure = float(row[5])   # OUT_PT050
-                power = float(row[13])     # Main_kW
-                
-                # 비정상 데이터 필터링 (압력 < 5 bar는 시스템 이상)
-                if pressure > 5:
-                    rows.append({
-                        'flow': flow,
-                        'pressure': pressure,
-                        'power': power
-                    })
-            except (IndexError, ValueError):
-                continue
-    
-    if not rows:
-        return []
+    # Main_Flow(3), OUT_PT050(5), Main_kW(13) 컬럼만 C 파서로 일괄 로드
+    df = pd.read_csv(
+        filepath,
+        usecols=[3, 5, 13],
+        header=0,
+        encoding='utf-8',
+        engine='c',
+        on_bad_lines='skip',
+    )
+    df.columns = ['flow', 'pressure', 'power']
+    
+    # 숫자로 변환할 수 없는 값/누락 컬럼이 있는 행 제외
+    df = df.apply(pd.to_numeric, errors='coerce').dropna()
+    
+    # 비정상 데이터 필터링 (압력 < 5 bar는 시스템 이상)
+    df = df[df['pressure'] > 5]
+    
+    if df.empty:
+        return np.empty(0, dtype=RESULT_DTYPE)
+    
+    flow = df['flow'].to_numpy()
+    power = df['power'].to_numpy()
+    pressure = df['pressure'].to_numpy()
     
     # 안정 구간 감지
-    segments = detect_stable_segments(rows)
-    
-    results = []
-    for start_idx, end_idx in segments:
-        avg = calculate_segment_average(rows, start_idx, end_idx)
-        results.append(avg)
+    segments = detect_stable_segments(flow)
     
-    return results
+    return calculate_segment_average(flow, power, pressure, segments)
 
 
 def main():
@@ -121,19 +156,22 @@ def main():
     # 2026년 CSV 파일만 처리
     csv_files = sorted([f for f in downloads_dir.glob('2026*.csv')])
     
-    all_points = []
-    
     print(f"처리 대상: {len(csv_files)}개 파일")
     print("-" * 60)
     
-    for csv_file in csv_files:
-        results = process_csv_file(csv_file)
-        
-        for result in results:
-            result['source_file'] = csv_file.name
-            all_points.append(result)
-            
-        if results:
+    # 파일별 처리는 서로 독립적이지만, 워커 기동 비용(spawn 방식에서는 pandas 재임포트)이
+    # 크므로 데이터가 충분히 클 때만 프로세스 풀 사용 (map은 입력 순서 유지)
+    total_bytes = sum(f.stat().st_size for f in csv_files)
+    if len(csv_files) > 1 and total_bytes >= PARALLEL_MIN_BYTES:
+        # Windows의 ProcessPoolExecutor는 워커 61개까지만 허용
+        max_workers = min(len(csv_files), os.cpu_count() or 1, 61)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            file_results = list(executor.map(process_csv_file, csv_files))
+    else:
+        file_results = list(map(process_csv_file, csv_files))
+    
+    for csv_file, results in zip(csv_files, file_results):
+        if len(results):
             print(f"{csv_file.name}: {len(results)}개 안정 구간")
             for r in results:
                 print(f"  Flow={r['flow']:5.1f} m³/h, Power={r['power']:5.2f} kW, "
@@ -142,18 +180,24 @@ def main():
         else:
             print(f"{csv_file.name}: 유효 구간 없음 (비정상 데이터)")
     
+    all_points = np.concatenate([np.empty(0, dtype=RESULT_DTYPE), *file_results])
+    source_files = np.repeat([f.name for f in csv_files], [len(r) for r in file_results])
+    
     # 유량순 정렬 후 중복 제거 (유사 유량은 평균)
-    all_points.sort(key=lambda x: x['flow'])
+    order = np.argsort(all_points['flow'], kind='stable')
+    all_points = all_points[order]
+    source_files = source_files[order]
     
     # 결과 저장
     output_file = output_dir / 'stable_operating_points_2026.csv'
     
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = ['flow', 'power', 'pressure', 'head', 'duration', 
-                      'std_flow', 'std_power', 'source_file']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(all_points)
+    fieldnames = ['flow', 'power', 'pressure', 'head', 'duration', 
+                  'std_flow', 'std_power', 'source_file']
+    output_df = pd.DataFrame(all_points)
+    output_df['source_file'] = source_files
+    output_df[fieldnames].to_csv(
+        output_file, index=False, encoding='utf-8', lineterminator='\r\n'
+    )
     
     print("-" * 60)
     print(f"총 {len(all_points)}개 운전점 추출 완료")
@@ -161,9 +205,10 @@ def main():
     
     # 요약 통계
     print("\n=== 요약 ===")
-    print(f"유량 범위: {min(p['flow'] for p in all_points):.1f} ~ {max(p['flow'] for p in all_points):.1f} m³/h")
-    print(f"전력 범위: {min(p['power'] for p in all_points):.2f} ~ {max(p['power'] for p in all_points):.2f} kW")
-    print(f"압력 범위: {min(p['pressure'] for p in all_points):.2f} ~ {max(p['pressure'] for p in all_points):.2f} bar")
+    flow, power, pressure = all_points['flow'], all_points['power'], all_points['pressure']
+    print(f"유량 범위: {flow.min():.1f} ~ {flow.max():.1f} m³/h")
+    print(f"전력 범위: {power.min():.2f} ~ {power.max():.2f} kW")
+    print(f"압력 범위: {pressure.min():.2f} ~ {pressure.max():.2f} bar")
 
 
 if __name__ == '__main__':
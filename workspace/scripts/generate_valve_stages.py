@@ -6,56 +6,54 @@ VALVE_STAGES 생성 스크립트
 대표 VALVE_STAGES 배열을 생성합니다.
 """
 
-import csv
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 
 def load_operating_points(filepath):
     """CSV에서 운전점 데이터 로드"""
-    points = []
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            points.append({
-                'flow': float(row['flow']),
-                'power': float(row['power']),
-                'pressure': float(row['pressure']),
-                'head': float(row['head']),
-                'duration': int(row['duration'])
-            })
-    return points
+    return pd.read_csv(filepath, usecols=['flow', 'power', 'pressure', 'head', 'duration'],
+                       encoding='utf-8')
 
 
 def group_by_flow_range(points, flow_ranges):
-    """유량 범위별로 그룹핑"""
-    groups = {r: [] for r in flow_ranges}
-    
-    for p in points:
-        for (low, high) in flow_ranges:
-            if low <= p['flow'] < high:
-                groups[(low, high)].append(p)
+    """유량 범위별로 그룹핑 (범위가 겹치면 먼저 정의된 범위에 포함)"""
+    # 모든 경계값으로 기본 구간을 만들고, 각 기본 구간을 덮는 첫 번째 범위를 미리 매핑
+    edges = np.array(sorted({bound for r in flow_ranges for bound in r}), dtype=float)
+    edge_to_range = np.full(len(edges) - 1, -1)
+    for k in range(len(edges) - 1):
+        for i, (low, high) in enumerate(flow_ranges):
+            if low <= edges[k] and edges[k + 1] <= high:
+                edge_to_range[k] = i
                 break
     
-    return groups
+    # 이진 탐색으로 각 운전점의 기본 구간 결정
+    flow = points['flow'].to_numpy()
+    edge_idx = np.searchsorted(edges, flow, side='right') - 1
+    valid = (edge_idx >= 0) & (edge_idx < len(edges) - 1)
+    range_idx = np.where(valid, edge_to_range[np.clip(edge_idx, 0, len(edges) - 2)], -1)
+    
+    return {r: points[range_idx == i] for i, r in enumerate(flow_ranges)}
 
 
 def weighted_average(points):
     """지속시간 가중 평균 계산"""
-    if not points:
+    if points.empty:
         return None
     
-    total_duration = sum(p['duration'] for p in points)
+    total_duration = int(points['duration'].sum())
     
-    avg_flow = sum(p['flow'] * p['duration'] for p in points) / total_duration
-    avg_power = sum(p['power'] * p['duration'] for p in points) / total_duration
-    avg_pressure = sum(p['pressure'] * p['duration'] for p in points) / total_duration
-    avg_head = sum(p['head'] * p['duration'] for p in points) / total_duration
+    avg_flow, avg_power, avg_pressure, avg_head = np.average(
+        points[['flow', 'power', 'pressure', 'head']], weights=points['duration'], axis=0
+    )
     
     return {
-        'flow': round(avg_flow, 1),
-        'power': round(avg_power, 2),
-        'pressure': round(avg_pressure, 2),
-        'head': round(avg_head, 1),
+        'flow': round(float(avg_flow), 1),
+        'power': round(float(avg_power), 2),
+        'pressure': round(float(avg_pressure), 2),
+        'head': round(float(avg_head), 1),
         'n_samples': len(points),
         'total_duration': total_duration
     }